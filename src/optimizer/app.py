@@ -122,6 +122,83 @@ optimization_result_model = api.model('OptimizationResult', {
 })
 
 
+def parse_optimizer_args(data: dict) -> dict:
+    """
+    Parse a charge schedule request into the keyword arguments of the Optimizer constructor.
+    Raises an exception if the request data is invalid
+    """
+
+    # Parse strategy items with default values
+    strat_data = data.get('strategy', {})
+    strategy = OptimizationStrategy(
+        charging_strategy=strat_data.get('charging_strategy', 'none'),
+        discharging_strategy=strat_data.get('discharging_strategy', 'none')
+    )
+
+    # parse grid configuration
+    grid_data = data.get('grid', {})
+    grid = GridConfig(
+        p_max_imp=grid_data.get('p_max_imp', None),
+        p_max_exp=grid_data.get('p_max_exp', None),
+        prc_p_exc_imp=grid_data.get('prc_p_exc_imp', None)
+    )
+
+    # Parse battery configurations
+    batteries = []
+    for bat_data in data['batteries']:
+        batteries.append(BatteryConfig(
+            charge_from_grid=bat_data.get('charge_from_grid', False),
+            discharge_to_grid=bat_data.get('discharge_to_grid', False),
+            s_capacity=bat_data.get('s_capacity', bat_data['s_max']),
+            s_min=bat_data['s_min'],
+            s_max=bat_data['s_max'],
+            s_initial=bat_data['s_initial'],
+            p_demand=bat_data.get('p_demand'),
+            s_goal=bat_data.get('s_goal'),
+            c_min=bat_data['c_min'],
+            c_max=bat_data['c_max'],
+            d_max=bat_data['d_max'],
+            p_a=bat_data['p_a'],
+            c_priority=bat_data.get('c_priority', 0),
+        ))
+
+    # Parse time series data
+    time_series = TimeSeriesData(
+        dt=data['time_series']['dt'],
+        gt=data['time_series']['gt'],
+        ft=data['time_series']['ft'],
+        p_N=data['time_series']['p_N'],
+        p_E=data['time_series']['p_E'],
+    )
+
+    # Validate time series lengths
+    lengths = [len(time_series.gt), len(time_series.ft),
+               len(time_series.p_N), len(time_series.p_E)]
+
+    # Validate p_demand if provided
+    for bat in batteries:
+        if bat.p_demand is not None:
+            lengths.append(len(bat.p_demand))
+
+    # Validate s_goal if provided
+    for bat in batteries:
+        if bat.s_goal is not None:
+            lengths.append(len(bat.s_goal))
+
+    if len(set(lengths)) > 1:
+        raise ValueError("All time series must have the same length")
+
+    return {
+        'strategy': strategy,
+        'grid': grid,
+        'batteries': batteries,
+        'time_series': time_series,
+        'eta_c': data.get('eta_c', 0.95),
+        'eta_d': data.get('eta_d', 0.95),
+        'M': 1e6,
+    }
+
+
 @ns.route('/charge-schedule')
 class OptimizeCharging(Resource):
     @api.expect(optimization_input_model, validate=True)
@@ -134,82 +211,13 @@ class OptimizeCharging(Resource):
         EV charging schedules considering battery constraints, grid prices, and energy demands.
         """
         try:
-            data = api.payload
-
-            # Parse strategy items with default values
-            strat_data = data.get('strategy', {})
-            strategy = OptimizationStrategy(
-                charging_strategy=strat_data.get('charging_strategy', 'none'),
-                discharging_strategy=strat_data.get('discharging_strategy', 'none')
-            )
-
-            # parse grid configuration
-            grid_data = data.get('grid', {})
-            grid = GridConfig(
-                p_max_imp=grid_data.get('p_max_imp', None),
-                p_max_exp=grid_data.get('p_max_exp', None),
-                prc_p_exc_imp=grid_data.get('prc_p_exc_imp', None)
-            )
-
-            # Parse battery configurations
-            batteries = []
-            for bat_data in data['batteries']:
-                batteries.append(BatteryConfig(
-                    charge_from_grid=bat_data.get('charge_from_grid', False),
-                    discharge_to_grid=bat_data.get('discharge_to_grid', False),
-                    s_capacity=bat_data.get('s_capacity', bat_data['s_max']),
-                    s_min=bat_data['s_min'],
-                    s_max=bat_data['s_max'],
-                    s_initial=bat_data['s_initial'],
-                    p_demand=bat_data.get('p_demand'),
-                    s_goal=bat_data.get('s_goal'),
-                    c_min=bat_data['c_min'],
-                    c_max=bat_data['c_max'],
-                    d_max=bat_data['d_max'],
-                    p_a=bat_data['p_a'],
-                    c_priority=bat_data.get('c_priority', 0),
-                ))
-
-            # Parse time series data
-            time_series = TimeSeriesData(
-                dt=data['time_series']['dt'],
-                gt=data['time_series']['gt'],
-                ft=data['time_series']['ft'],
-                p_N=data['time_series']['p_N'],
-                p_E=data['time_series']['p_E'],
-            )
-
-            # Validate time series lengths
-            lengths = [len(time_series.gt), len(time_series.ft),
-                       len(time_series.p_N), len(time_series.p_E)]
-
-            # Validate p_demand if provided
-            for bat in batteries:
-                if bat.p_demand is not None:
-                    lengths.append(len(bat.p_demand))
-
-            # Validate s_goal if provided
-            for bat in batteries:
-                if bat.s_goal is not None:
-                    lengths.append(len(bat.s_goal))
-
-            if len(set(lengths)) > 1:
-                api.abort(400, "All time series must have the same length")
-
+            optimizer_args = parse_optimizer_args(api.payload)
         except Exception as e:
             api.abort(400, f"Invalid data format: {str(e)}")
 
         try:
             # Create and solve optimizer
-            optimizer = Optimizer(
-                strategy=strategy,
-                grid=grid,
-                batteries=batteries,
-                time_series=time_series,
-                eta_c=data.get('eta_c', 0.95),
-                eta_d=data.get('eta_d', 0.95),
-                M=1e6
-            )
+            optimizer = Optimizer(**optimizer_args)
 
             result = optimizer.solve()
             return result
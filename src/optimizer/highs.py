@@ -0,0 +1,183 @@
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pulp
+
+from .settings import OptimizerSettings
+
+try:
+    import highspy
+except ImportError:  # pragma: no cover - optional dependency
+    highspy = None
+
+
+@dataclass
+class WarmStart:
+    """
+    Solver state of a previous solve, used to warm-start a model with the same structure
+    """
+    col_names: List[str]
+    row_names: List[str]
+    integrality: List[bool]
+    col_value: List[float]
+    basis: Optional["highspy.HighsBasis"] = None
+
+    def matches(self, col_names: List[str], row_names: List[str], integrality: List[bool]) -> bool:
+        """
+        True if the model has the same columns, rows and integrality as the model this state was taken from
+        """
+        return self.col_names == col_names and self.row_names == row_names and self.integrality == integrality
+
+
+def available() -> bool:
+    """
+    True if the highspy package is installed
+    """
+    return highspy is not None
+
+
+def solve(problem: pulp.LpProblem, settings: OptimizerSettings, warm_start: WarmStart | None = None) -> Tuple[int, WarmStart | None]:
+    """
+    Solve the PuLP problem in-process with HiGHS.
+
+    Instead of handing the problem to PuLP's solver interface, which adds every column
+    and row to the solver one by one (or writes an MPS file for the CMD solvers), the
+    model is flattened into one row-wise sparse matrix and passed to HiGHS in a single
+    passModel() call. Results are written back to the PuLP variables so that result
+    extraction does not depend on the solver used.
+
+    If a warm start from a previous solve of a model with identical structure is given,
+    its solution is passed to HiGHS as MIP start, or its basis for a pure LP.
+    Returns the PuLP status code and the warm start state of this solve.
+    """
+
+    h = highspy.Highs()
+    h.setOptionValue("output_flag", False)
+    # solve to proven optimality like CBC does by default
+    h.setOptionValue("mip_rel_gap", 0.)
+    if settings.num_threads is not None:
+        h.setOptionValue("threads", settings.num_threads)
+    if settings.time_limit is not None:
+        h.setOptionValue("time_limit", float(settings.time_limit))
+
+    h.passModel(_build_lp(problem))
+
+    col_names, row_names, integrality = structure(problem)
+    is_mip = any(integrality)
+    if warm_start is not None and warm_start.matches(col_names, row_names, integrality):
+        if is_mip:
+            solution = highspy.HighsSolution()
+            solution.col_value = warm_start.col_value
+            solution.value_valid = True
+            h.setSolution(solution)
+        elif warm_start.basis is not None:
+            h.setBasis(warm_start.basis)
+
+    h.run()
+
+    status = _assign_solution(problem, h)
+    if status != pulp.LpStatusOptimal:
+        return status, None
+
+    basis = h.getBasis() if not is_mip else None
+    return status, WarmStart(col_names, row_names, integrality, list(h.getSolution().col_value),
+                             basis if basis is not None and basis.valid else None)
+
+
+def structure(problem: pulp.LpProblem) -> Tuple[List[str], List[str], List[bool]]:
+    """
+    Column names, row names and column integrality of the problem, as compared by WarmStart.matches()
+    """
+    variables = problem.variables()
+    return [var.name for var in variables], list(problem.constraints.keys()), [var.cat == pulp.LpInteger for var in variables]
+
+
+def _build_lp(problem: pulp.LpProblem) -> "highspy.HighsLp":
+    """
+    Flatten the PuLP problem into a HiGHS LP with a row-wise constraint matrix
+    """
+
+    inf = highspy.kHighsInf
+    variables = problem.variables()
+    index = {var.name: j for j, var in enumerate(variables)}
+
+    lp = highspy.HighsLp()
+    lp.num_col_ = len(variables)
+    lp.num_row_ = len(problem.constraints)
+    lp.sense_ = highspy.ObjSense.kMaximize if problem.sense == pulp.LpMaximize else highspy.ObjSense.kMinimize
+    lp.offset_ = float(problem.objective.constant) if problem.objective is not None else 0.
+
+    # columns: objective coefficients, bounds and integrality
+    col_cost = np.zeros(lp.num_col_)
+    if problem.objective is not None:
+        for var, coef in problem.objective.items():
+            col_cost[index[var.name]] = coef
+    lp.col_cost_ = col_cost
+    lp.col_lower_ = np.array([-inf if var.lowBound is None else var.lowBound for var in variables], dtype=np.float64)
+    lp.col_upper_ = np.array([inf if var.upBound is None else var.upBound for var in variables], dtype=np.float64)
+    lp.integrality_ = [highspy.HighsVarType.kInteger if var.cat == pulp.LpInteger else highspy.HighsVarType.kContinuous
+                       for var in variables]
+
+    # rows: the constraint constant is moved to the bounds
+    row_lower = np.empty(lp.num_row_)
+    row_upper = np.empty(lp.num_row_)
+    start = np.zeros(lp.num_row_ + 1, dtype=np.int32)
+    col_index = []
+    value = []
+    for r, constraint in enumerate(problem.constraints.values()):
+        rhs = -constraint.constant
+        row_lower[r] = rhs if constraint.sense in (pulp.LpConstraintGE, pulp.LpConstraintEQ) else -inf
+        row_upper[r] = rhs if constraint.sense in (pulp.LpConstraintLE, pulp.LpConstraintEQ) else inf
+        for var, coef in constraint.items():
+            if coef != 0:
+                col_index.append(index[var.name])
+                value.append(coef)
+        start[r + 1] = len(col_index)
+
+    lp.row_lower_ = row_lower
+    lp.row_upper_ = row_upper
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+    lp.a_matrix_.num_col_ = lp.num_col_
+    lp.a_matrix_.num_row_ = lp.num_row_
+    lp.a_matrix_.start_ = start
+    lp.a_matrix_.index_ = np.array(col_index, dtype=np.int32)
+    lp.a_matrix_.value_ = np.array(value, dtype=np.float64)
+
+    return lp
+
+
+def _assign_solution(problem: pulp.LpProblem, h: "highspy.Highs") -> int:
+    """
+    Map the HiGHS model status to PuLP and copy the column values to the PuLP variables
+    """
+
+    model_status = h.getModelStatus()
+    has_solution = h.getInfo().primal_solution_status == highspy.SolutionStatus.kSolutionStatusFeasible
+
+    if model_status == highspy.HighsModelStatus.kOptimal:
+        status, sol_status = pulp.LpStatusOptimal, pulp.LpSolutionOptimal
+    elif model_status in (highspy.HighsModelStatus.kInfeasible, highspy.HighsModelStatus.kUnboundedOrInfeasible):
+        status, sol_status = pulp.LpStatusInfeasible, pulp.LpSolutionInfeasible
+    elif model_status == highspy.HighsModelStatus.kUnbounded:
+        status, sol_status = pulp.LpStatusUnbounded, pulp.LpSolutionUnbounded
+    elif has_solution:
+        # stopped early, e.g. due to the time limit, with a feasible solution
+        status, sol_status = pulp.LpStatusOptimal, pulp.LpSolutionIntegerFeasible
+    else:
+        status, sol_status = pulp.LpStatusNotSolved, pulp.LpSolutionNoSolutionFound
+
+    if has_solution:
+        # remove the numerical noise of the solver: values are clipped to the variable bounds,
+        # integer values rounded, as CBC reports them
+        variables = problem.variables()
+        lower = np.array([-np.inf if var.lowBound is None else var.lowBound for var in variables], dtype=np.float64)
+        upper = np.array([np.inf if var.upBound is None else var.upBound for var in variables], dtype=np.float64)
+        col_value = np.clip(np.asarray(h.getSolution().col_value, dtype=np.float64), lower, upper)
+        is_integer = np.array([var.cat == pulp.LpInteger for var in variables], dtype=bool)
+        col_value[is_integer] = np.round(col_value[is_integer])
+        for var, value in zip(variables, col_value.tolist()):
+            var.varValue = value
+
+    problem.assignStatus(status, sol_status)
+    return status
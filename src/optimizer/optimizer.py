@@ -1,11 +1,16 @@
-from dataclasses import dataclass
+import copy
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
 from tempfile import TemporaryDirectory
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, get_args
 
 import numpy as np
 import pulp
 
-from .settings import OptimizerSettings
+from . import highs
+from .settings import OptimizerSettings, Solver
 
 
 @dataclass
@@ -38,6 +43,24 @@ class BatteryConfig:
     c_priority: int = 0
 
 
+@dataclass
+class BatteryArrays:
+    """
+    Battery parameters as arrays over the batteries, shape (B,), and batteries x time steps,
+    shape (B, T). Time series not given for a battery are filled with NaN.
+    """
+    c_min: np.ndarray
+    c_max: np.ndarray
+    d_max: np.ndarray
+    s_min: np.ndarray
+    s_max: np.ndarray
+    s_capacity: np.ndarray
+    p_a: np.ndarray
+    c_priority: np.ndarray
+    p_demand: np.ndarray
+    s_goal: np.ndarray
+
+
 @dataclass
 class TimeSeriesData:
     dt: List[int]  # time step length [s]
@@ -47,6 +70,24 @@ class TimeSeriesData:
     p_E: List[float]  # Export prices [currency unit/Wh]
 
 
+logger = logging.getLogger(__name__)
+
+
+def _dot(coefs, variables) -> pulp.LpAffineExpression:
+    """
+    Linear expression of the element wise product of coefficients and variables.
+    Unlike pulp.lpDot this does not create an intermediate expression per element.
+    """
+    return pulp.LpAffineExpression(zip(variables, np.asarray(coefs, dtype=np.float64).tolist()))
+
+
+def _values(variables) -> np.ndarray:
+    """
+    Solution values of a list of variables
+    """
+    return np.fromiter((var.varValue for var in variables), dtype=np.float64, count=len(variables))
+
+
 class Optimizer:
     """
     Optimizer class building the MILP model from the input data, and provides
@@ -54,36 +95,73 @@ class Optimizer:
     """
 
     def __init__(self, strategy: OptimizationStrategy, grid: GridConfig, batteries: List[BatteryConfig], time_series: TimeSeriesData,
-                 eta_c: float = 0.95, eta_d: float = 0.95, M: float = 1e6, optimizer_settings: OptimizerSettings | None = None):
+                 eta_c: float = 0.95, eta_d: float = 0.95, M: float = 1e6, optimizer_settings: OptimizerSettings | None = None,
+                 solver: Solver | None = None):
         """
         Optimizer Constructor
+
+        The solver backend defaults to the one configured in the optimizer settings.
         """
 
         self.settings = optimizer_settings or OptimizerSettings()
+        self.solver = solver or self.settings.solver
+        if self.solver not in get_args(Solver):
+            raise ValueError(f"Unknown solver '{self.solver}', expected one of {', '.join(get_args(Solver))}")
+        if self.solver == 'highs' and not highs.available():
+            logger.warning("HiGHS solver requested but highspy is not installed, falling back to CBC")
 
         self.strategy = strategy
         self.grid = grid
         self.batteries = batteries
-        self.time_series = time_series
         self.eta_c = eta_c
         self.eta_d = eta_d
         self.M = M
-        # number of time steps
-        self.T = len(time_series.gt)
-        # time step range
-        self.time_steps = range(self.T)
+        self._set_time_series(time_series)
         # the optimization problem
         self.problem = None
         # dictionary of optimizer variables
         self.variables = {}
+        # solver state of the last solve, used to warm-start subsequent solves
+        self.warm_start = None
+
+        self._setup_price_scaling()
+
+        # if there is a demand rate given in the input, the grid import limit will be interpreted as the
+        # threshold beyond wich the demand rate is to be applied. Compute a demand rate flag for use in the
+        # build constraint and build objective methods.
+        self.is_grid_demand_rate_active = False
+        if self.grid.p_max_imp is not None and self.grid.prc_p_exc_imp is not None:
+            self.is_grid_demand_rate_active = True
+
+    def _set_time_series(self, time_series: TimeSeriesData):
+        """
+        Set the time series data and the NumPy arrays derived from it
+        """
+        self.time_series = time_series
+        # number of time steps
+        self.T = len(time_series.gt)
+        # time step range
+        self.time_steps = range(self.T)
+        # converted once, used by the price scaling, model build and result evaluation
+        self._pN = np.asarray(time_series.p_N, dtype=np.float64)
+        self._pE = np.asarray(time_series.p_E, dtype=np.float64)
+        self._ft = np.asarray(time_series.ft, dtype=np.float64)
+        self._gt = np.asarray(time_series.gt, dtype=np.float64)
+        # time step length [h]
+        self._dt_h = np.asarray(time_series.dt, dtype=np.float64) / 3600.
+
+    def _setup_price_scaling(self):
+        """
+        Compute the scaling of strategy and penalty parameters from the time series
+        """
 
         # Compute scaling for strategy control parameters
-        self.min_import_price = np.min(self.time_series.p_N)
-        self.max_import_price = np.max(self.time_series.p_N)
+        self.min_import_price = np.min(self._pN)
+        self.max_import_price = np.max(self._pN)
 
         # scaling for penalty parameters. Make sure goal_penalty is always positive
         self.prc_e_goal_pen = np.min([self.max_import_price, 0.1e-3]) * 10e1
-        self.prc_p_goal_pen = np.min([self.max_import_price, 0.1e-3]) * np.max(self.time_series.dt) / 3600 * 10e1
+        self.prc_p_goal_pen = np.min([self.max_import_price, 0.1e-3]) * np.max(self._dt_h) * 10e1
         self.prc_soc_exc_pen = np.min([self.max_import_price, 0.1e-3]) * 10e2
 
         # penalty for exceeding grid import limit. Result shall not become infeasible but report the violation
@@ -93,13 +171,6 @@ class Optimizer:
         # solar power
         self.prc_e_grid_exp_pen = np.min([self.max_import_price, 0.1e-3]) * 10e1
 
-        # if there is a demand rate given in the input, the grid import limit will be interpreted as the
-        # threshold beyond wich the demand rate is to be applied. Compute a demand rate flag for use in the
-        # build constraint and build objective methods.
-        self.is_grid_demand_rate_active = False
-        if self.grid.p_max_imp is not None and self.grid.prc_p_exc_imp is not None:
-            self.is_grid_demand_rate_active = True
-
     def create_model(self):
         """
         Create and initialize the MILP model
@@ -108,63 +179,145 @@ class Optimizer:
         # Create problem
         self.problem = pulp.LpProblem("EV_Charging_Optimization", pulp.LpMaximize)
 
+        self._bat = self._to_soa()
+        # maximum charge and discharge energy per battery and time step [Wh]
+        self._c_max_wh = self._bat.c_max[:, None] * self._dt_h
+        self._d_max_wh = self._bat.d_max[:, None] * self._dt_h
+
         self._setup_variables()
         self._setup_target_function()
         self._add_energy_balance_constraints()
         self._add_battery_constraints()
 
+    def _to_soa(self) -> BatteryArrays:
+        """
+        Convert the battery configurations to arrays for the vectorized model build
+        """
+
+        def field(name: str) -> np.ndarray:
+            return np.array([getattr(bat, name) for bat in self.batteries], dtype=np.float64)
+
+        def series(name: str) -> np.ndarray:
+            values = np.full((len(self.batteries), self.T), np.nan)
+            for i, bat in enumerate(self.batteries):
+                if getattr(bat, name) is not None:
+                    values[i] = getattr(bat, name)
+            return values
+
+        return BatteryArrays(
+            c_min=field('c_min'),
+            c_max=field('c_max'),
+            d_max=field('d_max'),
+            s_min=field('s_min'),
+            s_max=field('s_max'),
+            s_capacity=field('s_capacity'),
+            p_a=field('p_a'),
+            c_priority=field('c_priority'),
+            p_demand=series('p_demand'),
+            s_goal=series('s_goal'),
+        )
+
+    def _check_battery_series(self, T: int):
+        """
+        Raise a ValueError if a charge demand or SOC goal series of a battery does not have T time steps
+        """
+        for i, bat in enumerate(self.batteries):
+            for name in ('p_demand', 's_goal'):
+                values = getattr(bat, name)
+                if values is not None and len(values) != T:
+                    raise ValueError(f"{name} of battery {i} has {len(values)} time steps, the time series {T}")
+
+    def update_time_series(self, time_series: TimeSeriesData, s_initial: Optional[List[float]] = None):
+        """
+        Replace the time series data, and optionally the initial state of charge of the batteries,
+        for the next solve. If the model has already been created and the time steps are unchanged,
+        the model is updated in place: the objective is rebuilt, and the constants of the energy
+        balance and initial state of charge constraints are changed. Otherwise the model is
+        discarded and created again by the next solve.
+        The charge demand and SOC goal series of the batteries are not replaced, so a changed
+        number of time steps is only accepted for batteries without them.
+        """
+
+        self._check_battery_series(len(time_series.gt))
+        structure_changed = time_series.dt != self.time_series.dt or len(time_series.gt) != self.T
+
+        if s_initial is not None:
+            self.batteries = [replace(bat, s_initial=s) for bat, s in zip(self.batteries, s_initial, strict=True)]
+        self._set_time_series(time_series)
+        self._setup_price_scaling()
+
+        if self.problem is None:
+            return
+        if structure_changed:
+            self.problem = None
+            self.variables = {}
+            self.warm_start = None
+            return
+
+        self._setup_target_function()
+
+        balance_rhs = (self._gt - self._ft).tolist()
+        for t in self.time_steps:
+            self.problem.constraints[f"balance_{t}"].changeRHS(balance_rhs[t])
+
+        for i, bat in enumerate(self.batteries):
+            if self.T > 0:
+                self.problem.constraints[f"soc_{i}_0"].changeRHS(bat.s_initial)
+
+        # with lazy flow direction constraints, time steps may require them now due to the new prices
+        missing = [t for t in self._required_flow_direction_steps() if self.variables['y'][t] is None]
+        if missing:
+            self._add_flow_direction_constraints(missing)
+
     def _setup_variables(self):
         """
         Set up the variables of the MILP optimizer
         """
 
+        n_bat = len(self.batteries)
+
         # Charging power variables [Wh]
-        self.variables['c'] = {}
-        for i, bat in enumerate(self.batteries):
-            self.variables['c'][i] = [
-                pulp.LpVariable(f"c_{i}_{t}", lowBound=0, upBound=bat.c_max * self.time_series.dt[t] / 3600.)
-                for t in self.time_steps
-            ]
+        c = pulp.LpVariable.dicts("c", (range(n_bat), self.time_steps), lowBound=0)
+        self.variables['c'] = {i: list(c[i].values()) for i in range(n_bat)}
 
         # Discharging power variables [Wh]
-        self.variables['d'] = {}
-        for i, bat in enumerate(self.batteries):
-            self.variables['d'][i] = [
-                pulp.LpVariable(f"d_{i}_{t}", lowBound=0, upBound=bat.d_max * self.time_series.dt[t] / 3600.)
-                for t in self.time_steps
-            ]
+        d = pulp.LpVariable.dicts("d", (range(n_bat), self.time_steps), lowBound=0)
+        self.variables['d'] = {i: list(d[i].values()) for i in range(n_bat)}
 
         # State of charge variables [Wh]
-        self.variables['s'] = {}
+        s = pulp.LpVariable.dicts("s", (range(n_bat), self.time_steps), lowBound=0)
+        self.variables['s'] = {i: list(s[i].values()) for i in range(n_bat)}
+
+        # assign upper bounds in a single pass
         for i, bat in enumerate(self.batteries):
-            self.variables['s'][i] = [
-                pulp.LpVariable(f"s_{i}_{t}", lowBound=0, upBound=bat.s_capacity)
-                for t in self.time_steps
-            ]
+            c_ub = self._c_max_wh[i].tolist()
+            d_ub = self._d_max_wh[i].tolist()
+            for t in self.time_steps:
+                self.variables['c'][i][t].upBound = c_ub[t]
+                self.variables['d'][i][t].upBound = d_ub[t]
+                self.variables['s'][i][t].upBound = bat.s_capacity
 
         # penalty variable for not reaching given charge goals
         # variables are kept in a matrix Batteries X time steps, only those elements will have an
         # entry != None that have a SOC goal > 0 defined in the input data
-        self.variables['s_goal_pen'] = [[None for t in self.time_steps] for i in range(len(self.batteries))]
-        for i, bat in enumerate(self.batteries):
-            if self.batteries[i].s_goal is not None:
-                for t in self.time_steps:
-                    if self.batteries[i].s_goal[t] > 0:
-                        self.variables['s_goal_pen'][i][t] = pulp.LpVariable(f"s_goal_pen_{i}_{t}", lowBound=0)
+        s_goal_mask = self._bat.s_goal > 0
+        self.variables['s_goal_pen'] = [[pulp.LpVariable(f"s_goal_pen_{i}_{t}", lowBound=0) if s_goal_mask[i, t] else None
+                                         for t in self.time_steps] for i in range(n_bat)]
 
         # penalty variable for not being able to charge with the required power
-        self.variables['p_demand_pen'] = [[None for t in self.time_steps] for i in range(len(self.batteries))]
         # binary variable to allow one out of two alternative constraints
-        self.variables['z_p_demand'] = [[None for t in self.time_steps] for i in range(len(self.batteries))]
-        for i, bat in enumerate(self.batteries):
-            if bat.p_demand is not None:
-                for t in self.time_steps:
-                    self.variables['p_demand_pen'][i][t] = pulp.LpVariable(f"p_demand_pen_{i}_{t}", lowBound=0)
-                    self.variables['z_p_demand'][i][t] = pulp.LpVariable(f"z_p_demand_{i}_{t}", cat='Binary')
+        self.variables['p_demand_pen'] = [[None for t in self.time_steps] for i in range(n_bat)]
+        self.variables['z_p_demand'] = [[None for t in self.time_steps] for i in range(n_bat)]
+        for i in np.flatnonzero(self._has_p_demand()):
+            self.variables['p_demand_pen'][i] = list(pulp.LpVariable.dicts(f"p_demand_pen_{i}", self.time_steps, lowBound=0).values())
+            self.variables['z_p_demand'][i] = list(pulp.LpVariable.dicts(f"z_p_demand_{i}", self.time_steps, cat='Binary').values())
 
         # penalty variable for staying above max SOC and below min SOC
-        self.variables['s_max_pen'] = [[pulp.LpVariable(f"s_max_pen_{i}_{t}", lowBound=0) for t in self.time_steps] for i in range(len(self.batteries))]
-        self.variables['s_min_pen'] = [[pulp.LpVariable(f"s_min_pen_{i}_{t}", lowBound=0) for t in self.time_steps] for i in range(len(self.batteries))]
+        # not needed if the limit is already implied by the bounds of the SOC variable
+        self.variables['s_max_pen'] = [[pulp.LpVariable(f"s_max_pen_{i}_{t}", lowBound=0) for t in self.time_steps]
+                                       if bat.s_max < bat.s_capacity else None for i, bat in enumerate(self.batteries)]
+        self.variables['s_min_pen'] = [[pulp.LpVariable(f"s_min_pen_{i}_{t}", lowBound=0) for t in self.time_steps]
+                                       if bat.s_min > 0 else None for i, bat in enumerate(self.batteries)]
 
         # Grid import/export variables [Wh]
         self.variables['n'] = [pulp.LpVariable(f"n_{t}", lowBound=0) for t in self.time_steps]
@@ -193,20 +346,17 @@ class Optimizer:
         # these variables
         # 1. avoid direct export from import if export remuneration is greater than import cost
         # 2. control grid charging to batteries and grid export from batteries acc. to configuration
-        self.variables['y'] = []
-        for t in self.time_steps:
-            self.variables['y'].append(pulp.LpVariable(f"y_{t}", cat='Binary'))
+        # with lazy flow direction constraints, they are only created for the time steps that need them
+        # from the start, and added later by _add_flow_direction_constraints() if necessary.
+        required_steps = set(self._required_flow_direction_steps())
+        self.variables['y'] = [pulp.LpVariable(f"y_{t}", cat='Binary') if t in required_steps else None
+                               for t in self.time_steps]
 
         # Binary variable for charging activation
-        self.variables['z_c'] = {}
-        for i, bat in enumerate(self.batteries):
-            if bat.c_min > 0:
-                self.variables['z_c'][i] = [
-                    pulp.LpVariable(f"z_c_{i}_{t}", cat='Binary')
-                    for t in self.time_steps
-                ]
-            else:
-                self.variables['z_c'][i] = None
+        self.variables['z_c'] = {
+            i: list(pulp.LpVariable.dicts(f"z_c_{i}", self.time_steps, cat='Binary').values()) if has_c_min else None
+            for i, has_c_min in enumerate(self._has_c_min())
+        }
 
         # Binary variable to lock charging against discharging
         self.variables['z_cd'] = {}
@@ -216,111 +366,118 @@ class Optimizer:
                 for t in self.time_steps
             ]
 
+    def _has_c_min(self) -> np.ndarray:
+        """
+        Mask of the batteries with a minimum charge power constraint. Minimum charge powers below
+        the c_min_threshold fraction of the maximum charge power are not modelled: this saves one
+        binary variable and two rows per time step, at the cost of allowing charge powers between
+        0 and c_min that the battery or vehicle may not be able to realize.
+        """
+        return (self._bat.c_min > 0) & (self._bat.c_min >= self.settings.c_min_threshold * self._bat.c_max)
+
+    def _has_p_demand(self) -> np.ndarray:
+        """
+        Mask of the batteries with a charge demand time series
+        """
+        return ~np.isnan(self._bat.p_demand).all(axis=1)
+
     def _setup_target_function(self):
         """
         Gather all target function contributions and instantiate the objective
         """
 
         # Objective function (1): Maximize economic benefit
-        objective = 0
+        # the contributions are collected as linear expressions and summed up once at the end
+        objective = []
+        p_N = self._pN
+        p_E = self._pE
+        t_arr = np.arange(self.T)
 
         ############################################################################
         # actual cost & benefit elements
 
         # Grid import cost (negative because we want to minimize cost) [currency unit]
-        for t in self.time_steps:
-            # if a demand rate beyond p_max_imp is applied, both portions have to be considered
-            # for energy cost. If only an import limit is given, there should never be power
-            # import beyond p_max_imp, however, if the limit gets violated, we account for
-            # the energy cost as well to stay consistent.
-            if self.grid.p_max_imp is not None:
-                objective -= (
-                    # grid import up to the demand rate threshold
-                    self.variables['n'][t]
-                    # import beyond the threshold
-                    + self.variables['e_imp_lim_exc'][t]
-                ) * self.time_series.p_N[t]
-            else:
-                # standard case
-                objective -= self.variables['n'][t] * self.time_series.p_N[t]
+        # if a demand rate beyond p_max_imp is applied, both portions have to be considered
+        # for energy cost. If only an import limit is given, there should never be power
+        # import beyond p_max_imp, however, if the limit gets violated, we account for
+        # the energy cost as well to stay consistent.
+        objective.append(_dot(-p_N, self.variables['n']))
+        if self.grid.p_max_imp is not None:
+            # import beyond the threshold
+            objective.append(_dot(-p_N, self.variables['e_imp_lim_exc']))
 
         # Grid export revenue [currency unit]
-        for t in self.time_steps:
-            objective += self.variables['e'][t] * self.time_series.p_E[t]
+        objective.append(_dot(p_E, self.variables['e']))
 
         # Final state of charge value [currency unit]
-        for i, bat in enumerate(self.batteries):
-            objective += self.variables['s'][i][-1] * bat.p_a
+        objective.append(_dot(self._bat.p_a, [self.variables['s'][i][-1] for i in range(len(self.batteries))]))
 
         # charge for import power demand rate. The demand rate is applied to the maximum
         # power draw beyond the threshold within the time horizon.
         if self.is_grid_demand_rate_active:
-            objective += - self.grid.prc_p_exc_imp * self.variables['p_max_imp_exc']
+            objective.append(- self.grid.prc_p_exc_imp * self.variables['p_max_imp_exc'])
 
         ############################################################################
         # Penalties for exceeding battery SOC limits at start
         for i, bat in enumerate(self.batteries):
-            for t in self.time_steps:
-                objective += - self.prc_soc_exc_pen * (self.variables['s_max_pen'][i][t] + self.variables['s_min_pen'][i][t])
+            if self.variables['s_max_pen'][i] is not None:
+                objective.append(_dot(np.full(self.T, - self.prc_soc_exc_pen), self.variables['s_max_pen'][i]))
+            if self.variables['s_min_pen'][i] is not None:
+                objective.append(_dot(np.full(self.T, - self.prc_soc_exc_pen), self.variables['s_min_pen'][i]))
 
         ############################################################################
         # Penalties for goals that cannot be met
-        for i, bat in enumerate(self.batteries):
+        has_p_demand = self._has_p_demand()
+        for i in range(len(self.batteries)):
             # unmet battery charging goals
-            if self.batteries[i].s_goal is not None:
-                for t in self.time_steps:
-                    if self.batteries[i].s_goal[t] > 0:
-                        # negative target function contribution in a maximizing optimization
-                        objective += - self.prc_e_goal_pen * self.variables['s_goal_pen'][i][t]
+            # negative target function contribution in a maximizing optimization
+            s_goal_pen = [var for var in self.variables['s_goal_pen'][i] if var is not None]
+            objective.append(_dot(np.full(len(s_goal_pen), - self.prc_e_goal_pen), s_goal_pen))
             # unmet charging demand due to battery reaching maximum SOC with incentive to do charging early
-            if bat.p_demand is not None:
-                for t in self.time_steps:
-                    objective += - self.prc_p_goal_pen \
-                        * self.variables['p_demand_pen'][i][t] \
-                        * (1 + (self.T - t)/self.T)
+            if has_p_demand[i]:
+                objective.append(_dot(- self.prc_p_goal_pen * (1 + (self.T - t_arr) / self.T), self.variables['p_demand_pen'][i]))
 
         # penalties for grid power limits that cannot be met.
-        for t in self.time_steps:
+        # penalty for exceeding the given import limit
+        if self.grid.p_max_imp is not None and not self.is_grid_demand_rate_active:
+            # negative target function contribution in a maximizing optimization
+            objective.append(_dot(np.full(self.T, - self.prc_e_grid_imp_pen), self.variables['e_imp_lim_exc']))
 
-            # penalty for exceeding the given import limit
-            if self.grid.p_max_imp is not None and not self.is_grid_demand_rate_active:
-                # negative target function contribution in a maximizing optimization
-                objective += - self.prc_e_grid_imp_pen * self.variables['e_imp_lim_exc'][t]
-
-            # penalty for exceeding the grid export limit
-            if self.grid.p_max_exp is not None:
-                # negative target function contribution in a maximizing optimization
-                # decrease penalty slightly over time to push limit exceeding to late times
-                objective += - self.prc_e_grid_exp_pen * (1.0 - t * 1e-5) * self.variables['e_exp_lim_exc'][t]
+        # penalty for exceeding the grid export limit
+        if self.grid.p_max_exp is not None:
+            # negative target function contribution in a maximizing optimization
+            # decrease penalty slightly over time to push limit exceeding to late times
+            objective.append(_dot(- self.prc_e_grid_exp_pen * (1.0 - t_arr * 1e-5), self.variables['e_exp_lim_exc']))
 
         #############################################################################
         # Secondary strategies to implement preferences without impact to actual cost
 
+        # coefficients decreasing over the time horizon to prefer early action
+        n_bat = len(self.batteries)
+        remaining = (self.T - t_arr) * self.min_import_price
+
         # prefer charging first, then grid export
+        # the term has always been added once per battery, hence the factor
         if self.strategy.charging_strategy == 'charge_before_export':
-            for i, bat in enumerate(self.batteries):
-                for t in self.time_steps:
-                    objective += - self.variables['e'][t] * self.min_import_price * 2e-5 * (self.T - t)
+            objective.append(_dot(- n_bat * 2e-5 * remaining, self.variables['e']))
 
         # prefer charging at high solar production times to unload public grid from peaks
         if self.strategy.charging_strategy == 'attenuate_grid_peaks':
-            for i, bat in enumerate(self.batteries):
-                for t in self.time_steps:
-                    objective += self.variables['c'][i][t] * self.time_series.ft[t] * self.min_import_price * 1e-6
+            ft_coefs = self._ft * self.min_import_price * 1e-6
+            for i in range(n_bat):
+                objective.append(_dot(ft_coefs, self.variables['c'][i]))
 
         # prefer discharging batteries completely before importing from grid
         if self.strategy.discharging_strategy == 'discharge_before_import':
-            for i, bat in enumerate(self.batteries):
-                for t in self.time_steps:
-                    objective += - self.variables['n'][t] * self.min_import_price * 5e-6 * (self.T - t)
+            objective.append(_dot(- n_bat * 5e-6 * remaining, self.variables['n']))
 
         # charging and discharging priorities
-        for i, bat in enumerate(self.batteries):
-            for t in self.time_steps:
-                objective += self.variables['c'][i][t] * self.min_import_price * 5e-5 * (self.T - t) * bat.c_priority
-                objective += self.variables['d'][i][t] * self.min_import_price * 5e-5 * (self.T - t) * bat.c_priority
+        for i in range(n_bat):
+            prio_coefs = remaining * 5e-5 * self._bat.c_priority[i]
+            objective.append(_dot(prio_coefs, self.variables['c'][i]))
+            objective.append(_dot(prio_coefs, self.variables['d'][i]))
 
-        self.problem += objective
+        self.problem.setObjective(pulp.lpSum(objective))
 
     def _add_energy_balance_constraints(self):
         """
@@ -333,12 +490,11 @@ class Optimizer:
         # - net charge and discharge of each battery
         # - grid import
         # - grid export
+        balance = {}
         for t in self.time_steps:
             # battery charge + discharge balance
-            battery_net_discharge = 0
-            for i, bat in enumerate(self.batteries):
-                battery_net_discharge += (- self.variables['c'][i][t]
-                                          + self.variables['d'][i][t])
+            battery_net_discharge = pulp.lpSum(- self.variables['c'][i][t] + self.variables['d'][i][t]
+                                               for i in range(len(self.batteries)))
 
             # grid import: if there is an import power limit, the power exceeding the limit
             # is going to the penalty variable. If a demand rate is active, it is applied
@@ -358,53 +514,47 @@ class Optimizer:
             if self.grid.p_max_exp is not None:
                 e_grid_exp = self.variables['e'][t]+self.variables['e_exp_lim_exc'][t]
 
-            self.problem += (battery_net_discharge
-                             + self.time_series.ft[t]
-                             + e_grid_imp
-                             == e_grid_exp
-                             + self.time_series.gt[t])
+            balance[f"balance_{t}"] = (battery_net_discharge
+                                       + self.time_series.ft[t]
+                                       + e_grid_imp
+                                       == e_grid_exp
+                                       + self.time_series.gt[t])
+        self.problem.extend(balance)
 
         # Constraints (4)-(5): Grid flow direction
-        for t in self.time_steps:
-            # Export constraint
-            self.problem += self.variables['e'][t] <= self.M * self.variables['y'][t]
-            # Import constraint
-            self.problem += self.variables['n'][t] <= self.M * (1 - self.variables['y'][t])
+        self.problem.extend(self._grid_flow_direction_constraints(self._flow_direction_steps()))
 
         # limit regular grid import power
+        # without demand rate this limits the actual import power, with demand rate active
+        # the demand rate free portion of the power
         if self.grid.p_max_imp is not None:
-            if self.is_grid_demand_rate_active:
-                # limit the demand rate free portion of the power
-                for t in self.time_steps:
-                    self.problem += self.variables['n'][t] <= self.grid.p_max_imp * self.time_series.dt[t] / 3600
-                    self.problem += (self.grid.p_max_imp * self.time_series.dt[t] / 3600 - self.variables['n'][t]
-                                     <= self.M * self.variables['z_imp_lim'][t])
-                    self.problem += (self.variables['e_imp_lim_exc'][t]
-                                     <= self.M * (1 - self.variables['z_imp_lim'][t]))
-            else:
-                # limit the actual import power
-                for t in self.time_steps:
-                    self.problem += self.variables['n'][t] <= self.grid.p_max_imp * self.time_series.dt[t] / 3600
-                    self.problem += (self.grid.p_max_imp * self.time_series.dt[t] / 3600 - self.variables['n'][t]
-                                     <= self.M * self.variables['z_imp_lim'][t])
-                    self.problem += (self.variables['e_imp_lim_exc'][t]
-                                     <= self.M * (1 - self.variables['z_imp_lim'][t]))
+            import_limit = {}
+            for t in self.time_steps:
+                import_limit[f"grid_imp_lim_{t}"] = self.variables['n'][t] <= self.grid.p_max_imp * self._dt_h[t]
+                import_limit[f"grid_imp_lim_hit_{t}"] = (self.grid.p_max_imp * self._dt_h[t] - self.variables['n'][t]
+                                                         <= self.M * self.variables['z_imp_lim'][t])
+                import_limit[f"grid_imp_lim_exc_{t}"] = (self.variables['e_imp_lim_exc'][t]
+                                                         <= self.M * (1 - self.variables['z_imp_lim'][t]))
+            self.problem.extend(import_limit)
 
         # limit regular grid export power
         if self.grid.p_max_exp is not None:
+            export_limit = {}
             for t in self.time_steps:
-                self.problem += self.variables['e'][t] <= self.grid.p_max_exp * self.time_series.dt[t] / 3600
-                self.problem += (self.grid.p_max_exp * self.time_series.dt[t] / 3600 - self.variables['e'][t]
-                                 <= self.M * self.variables['z_exp_lim'][t])
-                self.problem += (self.variables['e_exp_lim_exc'][t]
-                                 <= self.M * (1 - self.variables['z_exp_lim'][t]))
+                export_limit[f"grid_exp_lim_{t}"] = self.variables['e'][t] <= self.grid.p_max_exp * self._dt_h[t]
+                export_limit[f"grid_exp_lim_hit_{t}"] = (self.grid.p_max_exp * self._dt_h[t] - self.variables['e'][t]
+                                                         <= self.M * self.variables['z_exp_lim'][t])
+                export_limit[f"grid_exp_lim_exc_{t}"] = (self.variables['e_exp_lim_exc'][t]
+                                                         <= self.M * (1 - self.variables['z_exp_lim'][t]))
+            self.problem.extend(export_limit)
 
         # if demand rate is applied, the maximum grid import power value
         # of all time steps drives the demand rate charge
         if self.is_grid_demand_rate_active:
-            for t in self.time_steps:
-                self.problem += self.variables['e_imp_lim_exc'][t] \
-                    <= self.variables['p_max_imp_exc'] * self.time_series.dt[t] / 3600
+            self.problem.extend({
+                f"grid_imp_max_{t}": self.variables['e_imp_lim_exc'][t] <= self.variables['p_max_imp_exc'] * self._dt_h[t]
+                for t in self.time_steps
+            })
 
     def _add_battery_constraints(self):
         """
@@ -413,207 +563,357 @@ class Optimizer:
         # constraint for the max and min SOC. If the battery starts with an initial SOC
         # greater than the maximum SOC or lesser than min SOC, maximum discharging is forced until the max.
         # SOC is reached or max. charing will be forced until min SOC is reached.
-        for i, bat in enumerate(self.batteries):
-            for t in range(0, self.T):
-                self.problem += (self.variables['s_max_pen'][i][t] >= self.variables['s'][i][t] - bat.s_max)
-                self.problem += (self.variables['s_min_pen'][i][t] >= bat.s_min - self.variables['s'][i][t])
+        # Limits already covered by the bounds of the SOC variable have no penalty variable.
+        soc_limits = {}
+        s_max = self._bat.s_max.tolist()
+        s_min = self._bat.s_min.tolist()
+        for i in range(len(self.batteries)):
+            for t in self.time_steps:
+                if self.variables['s_max_pen'][i] is not None:
+                    soc_limits[f"s_max_{i}_{t}"] = (self.variables['s_max_pen'][i][t] >= self.variables['s'][i][t] - s_max[i])
+                if self.variables['s_min_pen'][i] is not None:
+                    soc_limits[f"s_min_{i}_{t}"] = (self.variables['s_min_pen'][i][t] >= s_min[i] - self.variables['s'][i][t])
+        self.problem.extend(soc_limits)
+
+        s_goal = self._bat.s_goal
+        s_goal_mask = s_goal > 0
+        # NaN compares False, so batteries without charge demand drop out of the mask
+        p_demand_mask = self._bat.p_demand > 0
+        # clip required charge to max charging power if needed
+        p_demand = np.minimum(self._c_max_wh, self._bat.p_demand)
+        c_min_mask = ~p_demand_mask & self._has_c_min()[:, None]
+        c_min_wh = self._bat.c_min[:, None] * self._dt_h
+        eta_c = self.eta_c
+        inv_eta_d = 1 / self.eta_d
 
-        # Constraint (3): Battery dynamics
         for i, bat in enumerate(self.batteries):
+            constraints = {}
+
+            # Constraint (3): Battery dynamics
+            # The SOC is kept as a variable per time step rather than substituted by the cumulated
+            # charge and discharge: the SOC limit rows exist for every time step, so substituting
+            # would turn the sparse two-term recurrence into dense triangular rows, while the
+            # solver presolve eliminates the recurrence where that pays off anyway.
+            # The rows are built directly from their coefficients, s[t] - s[t-1] - eta_c * c[t] + d[t] / eta_d = 0,
+            # instead of through expression arithmetic.
+            s, c, d = self.variables['s'][i], self.variables['c'][i], self.variables['d'][i]
             # Initial state of charge
             if len(self.time_steps) > 0:
-                self.problem += (self.variables['s'][i][0]
-                                 == bat.s_initial
-                                 + self.eta_c * self.variables['c'][i][0]
-                                 - (1 / self.eta_d) * self.variables['d'][i][0])
+                constraints[f"soc_{i}_0"] = pulp.LpConstraint(
+                    pulp.LpAffineExpression([(s[0], 1), (c[0], -eta_c), (d[0], inv_eta_d)]),
+                    pulp.LpConstraintEQ, rhs=bat.s_initial)
 
             # State of charge evolution
             for t in range(1, self.T):
-                self.problem += (self.variables['s'][i][t]
-                                 == self.variables['s'][i][t - 1]
-                                 + self.eta_c * self.variables['c'][i][t]
-                                 - (1 / self.eta_d) * self.variables['d'][i][t])
+                constraints[f"soc_{i}_{t}"] = pulp.LpConstraint(
+                    pulp.LpAffineExpression([(s[t], 1), (s[t - 1], -1), (c[t], -eta_c), (d[t], inv_eta_d)]),
+                    pulp.LpConstraintEQ, rhs=0.)
 
             # Constraint (6): Battery SOC goal constraints (for t > 0)
-            if bat.s_goal is not None:
-                for t in range(1, self.T):
-                    if bat.s_goal[t] > 0:
-                        self.problem += (self.variables['s'][i][t]
-                                         + self.variables['s_goal_pen'][i][t] >= bat.s_goal[t])
+            for t in np.flatnonzero(s_goal_mask[i, 1:]) + 1:
+                constraints[f"s_goal_{i}_{t}"] = (self.variables['s'][i][t]
+                                                  + self.variables['s_goal_pen'][i][t] >= s_goal[i, t])
 
             # Constraint: Minimum battery charge demand (for t > 0)
-            if bat.p_demand is not None:
-                for t in self.time_steps:
-                    if bat.p_demand[t] > 0:
-                        # clip required charge to max charging power if needed
-                        # and leave some air to breathe for the optimizer
-                        p_demand = min(bat.c_max * self.time_series.dt[t] / 3600., bat.p_demand[t])
-                        # two alternative constraints, only one is active:
-                        # constraint option 1: charge energy tries to reach min charge energy parameter
-                        self.problem += (self.variables['c'][i][t] + self.variables['p_demand_pen'][i][t]
-                                         + self.M * self.variables['z_p_demand'][i][t] >= p_demand)
-                        # constraint option 2: charge energy tries to reach energy to fill the battery to s_max
-                        self.problem += (self.variables['c'][i][t] + self.variables['p_demand_pen'][i][t]
-                                         + self.M * (1 - self.variables['z_p_demand'][i][t])
-                                         - (self.batteries[i].s_max - self.variables['s'][i][t]) >= 0.)
-                    elif bat.c_min > 0:
-                        # in time steps without given charging demand, apply normal lower bound:
-                        # Lower bound: either 0 or at least c_min
-                        self.problem += (self.variables['c'][i][t] >= bat.c_min * self.time_series.dt[t] / 3600.
-                                         * self.variables['z_c'][i][t])
-                        self.problem += (self.variables['c'][i][t] <= self.M * self.variables['z_c'][i][t])
-
-            # Constraint (7): Minimum charge power limits if there is not charge demand
-            elif bat.c_min > 0:
-                for t in self.time_steps:
+            # The big-M values are replaced by the tightest values implied by the variable bounds:
+            # the charge energy per time step is bounded by the upper bound of c, the energy
+            # required to fill the battery by s_max.
+            for t in self.time_steps:
+                if p_demand_mask[i, t]:
+                    # two alternative constraints, only one is active:
+                    # constraint option 1: charge energy tries to reach min charge energy parameter
+                    constraints[f"p_demand_{i}_{t}"] = (self.variables['c'][i][t] + self.variables['p_demand_pen'][i][t]
+                                                        + p_demand[i, t] * self.variables['z_p_demand'][i][t] >= p_demand[i, t])
+                    # constraint option 2: charge energy tries to reach energy to fill the battery to s_max
+                    constraints[f"p_demand_fill_{i}_{t}"] = (self.variables['c'][i][t] + self.variables['p_demand_pen'][i][t]
+                                                             + s_max[i] * (1 - self.variables['z_p_demand'][i][t])
+                                                             - (s_max[i] - self.variables['s'][i][t]) >= 0.)
+                elif c_min_mask[i, t]:
+                    # Constraint (7): Minimum charge power limits if there is no charge demand
                     # Lower bound: either 0 or at least c_min
-                    self.problem += (self.variables['c'][i][t] >= bat.c_min * self.time_series.dt[t] / 3600.
-                                     * self.variables['z_c'][i][t])
-                    self.problem += (self.variables['c'][i][t] <= self.M * self.variables['z_c'][i][t])
-
-            # control battery charging from grid
-            if not bat.charge_from_grid:
-                for t in self.time_steps:
-                    self.problem += (self.variables['c'][i][t] <= self.M * self.variables['y'][t])
+                    constraints[f"c_min_{i}_{t}"] = (self.variables['c'][i][t] >= c_min_wh[i, t] * self.variables['z_c'][i][t])
+                    constraints[f"c_on_{i}_{t}"] = (self.variables['c'][i][t] <= self._c_max_wh[i, t] * self.variables['z_c'][i][t])
 
-            # control battery discharging to grid
-            if not bat.discharge_to_grid:
-                for t in self.time_steps:
-                    self.problem += (self.variables['d'][i][t] <= self.M * (1 - self.variables['y'][t]))
+            # control battery charging from grid and discharging to grid
+            constraints.update(self._battery_flow_direction_constraints(i, self._flow_direction_steps()))
 
             # lock charging against discharging
             for t in self.time_steps:
                 # Discharge constraint
-                self.problem += self.variables['d'][i][t] <= self.M * self.variables['z_cd'][i][t]
+                constraints[f"d_lock_{i}_{t}"] = self.variables['d'][i][t] <= self._d_max_wh[i, t] * self.variables['z_cd'][i][t]
                 # Charge constraint
-                self.problem += self.variables['c'][i][t] <= self.M * (1 - self.variables['z_cd'][i][t])
+                constraints[f"c_lock_{i}_{t}"] = self.variables['c'][i][t] <= self._c_max_wh[i, t] * (1 - self.variables['z_cd'][i][t])
+
+            self.problem.extend(constraints)
+
+    def _required_flow_direction_steps(self) -> List[int]:
+        """
+        Time steps that need the grid flow direction constraints from the start.
+        Without lazy flow direction constraints, these are all time steps. Otherwise only those
+        where exporting imported energy is not penalized by the prices already, i.e. where the
+        export remuneration is not lower than the import price.
+        """
+        if not self.settings.lazy_flow_direction:
+            return list(self.time_steps)
+        return np.flatnonzero(self._pE >= self._pN).tolist()
+
+    def _flow_direction_steps(self) -> List[int]:
+        """
+        Time steps that have a grid flow direction variable
+        """
+        return [t for t in self.time_steps if self.variables['y'][t] is not None]
+
+    def _grid_flow_direction_constraints(self, time_steps: List[int]) -> Dict[str, pulp.LpConstraint]:
+        """
+        Grid flow direction constraints for the given time steps.
+        """
+        constraints = {}
+        for t in time_steps:
+            # Export constraint
+            constraints[f"grid_exp_dir_{t}"] = self.variables['e'][t] <= self.M * self.variables['y'][t]
+            # Import constraint
+            constraints[f"grid_imp_dir_{t}"] = self.variables['n'][t] <= self.M * (1 - self.variables['y'][t])
+        return constraints
 
-    def solve(self) -> Dict:
+    def _battery_flow_direction_constraints(self, i: int, time_steps: List[int]) -> Dict[str, pulp.LpConstraint]:
+        """
+        Constraints controlling charging from grid and discharging to grid of battery i for the given time steps.
+        """
+        bat = self.batteries[i]
+        constraints = {}
+        # control battery charging from grid
+        if not bat.charge_from_grid:
+            for t in time_steps:
+                constraints[f"c_grid_{i}_{t}"] = (self.variables['c'][i][t] <= self._c_max_wh[i, t] * self.variables['y'][t])
+
+        # control battery discharging to grid
+        if not bat.discharge_to_grid:
+            for t in time_steps:
+                constraints[f"d_grid_{i}_{t}"] = (self.variables['d'][i][t] <= self._d_max_wh[i, t] * (1 - self.variables['y'][t]))
+        return constraints
+
+    def _add_flow_direction_constraints(self, time_steps: List[int]):
+        """
+        Lazily add the grid flow direction variables and their constraints for the given time steps.
+        """
+        for t in time_steps:
+            self.variables['y'][t] = pulp.LpVariable(f"y_{t}", cat='Binary')
+
+        self.problem.extend(self._grid_flow_direction_constraints(time_steps))
+        for i in range(len(self.batteries)):
+            self.problem.extend(self._battery_flow_direction_constraints(i, time_steps))
+
+    def _violated_flow_direction_steps(self, tol: float = 1e-6) -> List[int]:
+        """
+        Time steps without flow direction constraints that have to be added after a solve.
+        A time step violates the flow direction constraints if no direction fits its flows: grid import
+        or discharging of a battery that must not discharge to grid requires y = 0, grid export or
+        charging of a battery that must not charge from grid requires y = 1. The latter pair also
+        covers energy moved between two such batteries without any grid flow.
+        If the solution violates the constraints in any time step, all time steps at risk are
+        returned: a violation is likely to move to another step with such flows, and each of them
+        would require another solve otherwise.
+        """
+        n = [var.varValue > tol for var in self.variables['n']]
+        e = [var.varValue > tol for var in self.variables['e']]
+        c = [any(self.variables['c'][i][t].varValue > tol for i, bat in enumerate(self.batteries) if not bat.charge_from_grid)
+             for t in self.time_steps]
+        d = [any(self.variables['d'][i][t].varValue > tol for i, bat in enumerate(self.batteries) if not bat.discharge_to_grid)
+             for t in self.time_steps]
+        open_steps = [t for t in self.time_steps if self.variables['y'][t] is None]
+
+        if not any((n[t] or d[t]) and (e[t] or c[t]) for t in open_steps):
+            return []
+
+        # time steps where the batteries with grid charging or discharging disabled could move their flows to
+        charge_banned = any(not bat.charge_from_grid and bat.c_max > 0 for bat in self.batteries)
+        discharge_banned = any(not bat.discharge_to_grid and bat.d_max > 0 for bat in self.batteries)
+        return [t for t in open_steps if ((n[t] or d[t]) and (e[t] or charge_banned)) or ((e[t] or c[t]) and discharge_banned)]
+
+    def solve(self, warm_start_from: Optional['Optimizer'] = None) -> Dict:
         """
         Creates the MILP model if none exists and solves the optimization problem.
+        With the HiGHS solver, the solution of a previously solved optimizer with the same
+        model structure (time steps, batteries, constraints) can be used to warm-start the solver.
+        Without it, the solution of the previous solve of this optimizer is used if there is one.
         Returns a dictionary with the optimization results
         """
 
         if self.problem is None:
             self.create_model()
 
-        # Solve the problem
-        solver = pulp.PULP_CBC_CMD(
-            msg=0,
-            threads=self.settings.num_threads,
-            timeLimit=self.settings.time_limit,
-        )
-        with TemporaryDirectory() as tmpdir:
-            solver.tmpDir = tmpdir
-            self.problem.solve(solver)
+        # Solve the problem. Flow direction constraints violated by the solution are added
+        # lazily and the problem is solved again until the solution satisfies all of them.
+        warm_start = warm_start_from.warm_start if warm_start_from is not None else self.warm_start
+        while True:
+            self._run_solver(warm_start)
+            if self.problem.status != pulp.LpStatusOptimal:
+                break
+            violated = self._violated_flow_direction_steps()
+            if not violated:
+                break
+            self._add_flow_direction_constraints(violated)
+            # the added rows and columns change the model structure, so no earlier solver state
+            # matches it anymore: the further lazy rounds solve cold
+            warm_start = None
 
         # Extract results
         status = pulp.LpStatus[self.problem.status]
 
+        if status != 'Optimal':
+            return {
+                'status': status,
+                'objective_value': None,
+                'limit_violations': {
+                    'grid_import_limit_exceeded': False,
+                    'grid_export_limit_hit': False
+                },
+                'batteries': [],
+                'grid_import': [],
+                'grid_export': [],
+                'flow_direction': [],
+                'grid_import_overshoot': [],
+                'grid_export_overshoot': []
+            }
+
         # grid import and export if no demand rate is active
         # if a limit is set and exceeded, this is the part that is actually imported / exported.
         # the exceeding portion is captured in 'e_imp_lim_exc' and / or 'e_exp_lim_exc'
-        e_grid_import = [pulp.value(var) for var in self.variables['n']]
-        e_grid_export = [pulp.value(var) for var in self.variables['e']]
+        e_grid_import = _values(self.variables['n'])
+        e_grid_export = _values(self.variables['e'])
         # if a demand rate is active, the actual import power is both parts, 'n' and 'e_imp_lim_exc'
         if self.is_grid_demand_rate_active:
-            for t in self.time_steps:
-                e_grid_import[t] += pulp.value(self.variables['e_imp_lim_exc'][t])
+            e_grid_import += _values(self.variables['e_imp_lim_exc'])
 
         # get limit violations
         # grid import limit
         grid_imp_limit_violated = False
-        e_grid_imp_overshoot = []
+        e_grid_imp_overshoot = np.empty(0)
         if self.grid.p_max_imp is not None:
-            grid_imp_limit_violated = (np.max([pulp.value(var) for var in self.variables['e_imp_lim_exc']]) > 0)
-            e_grid_imp_overshoot = [pulp.value(var) for var in self.variables['e_imp_lim_exc']]
+            e_grid_imp_overshoot = _values(self.variables['e_imp_lim_exc'])
+            grid_imp_limit_violated = bool(np.max(e_grid_imp_overshoot) > 0)
         # grid export limit
         grid_exp_limit_hit = False
-        e_grid_exp_overshoot = []
+        e_grid_exp_overshoot = np.empty(0)
         if self.grid.p_max_exp is not None:
-            grid_exp_limit_hit = (np.max([pulp.value(var) for var in self.variables['e_exp_lim_exc']]) > 0)
-            e_grid_exp_overshoot = [pulp.value(var) for var in self.variables['e_exp_lim_exc']]
-
-        if status == 'Optimal':
-            result = {
-                'status': status,
-                'objective_value': self.get_clean_objective_value(),
-                'limit_violations': {
-                    'grid_import_limit_exceeded': grid_imp_limit_violated,
-                    'grid_export_limit_hit': grid_exp_limit_hit
-                },
-                'batteries': [],
-                'grid_import': e_grid_import,
-                'grid_export': e_grid_export,
-                'flow_direction': [],
-                'grid_import_overshoot': e_grid_imp_overshoot,
-                'grid_export_overshoot': e_grid_exp_overshoot
-            }
-
-            # Extract battery results
-            for i, bat in enumerate(self.batteries):
-                battery_result = {
-                    'charging_power': [pulp.value(var) for var in self.variables['c'][i]],
-                    'discharging_power': [pulp.value(var) for var in self.variables['d'][i]],
-                    'state_of_charge': [pulp.value(var) for var in self.variables['s'][i]]
+            e_grid_exp_overshoot = _values(self.variables['e_exp_lim_exc'])
+            grid_exp_limit_hit = bool(np.max(e_grid_exp_overshoot) > 0)
+
+        # flow direction, if the constraint is not active: export if there is any
+        flow_direction = [round(y_var.varValue) if y_var is not None else int(e_grid_export[t] > 1e-6)
+                          for t, y_var in enumerate(self.variables['y'])]
+
+        return {
+            'status': status,
+            'objective_value': self.get_clean_objective_value(),
+            'limit_violations': {
+                'grid_import_limit_exceeded': grid_imp_limit_violated,
+                'grid_export_limit_hit': grid_exp_limit_hit
+            },
+            'batteries': [
+                {
+                    'charging_power': _values(self.variables['c'][i]).tolist(),
+                    'discharging_power': _values(self.variables['d'][i]).tolist(),
+                    'state_of_charge': _values(self.variables['s'][i]).tolist()
                 }
-                result['batteries'].append(battery_result)
+                for i in range(len(self.batteries))
+            ],
+            'grid_import': e_grid_import.tolist(),
+            'grid_export': e_grid_export.tolist(),
+            'flow_direction': flow_direction,
+            'grid_import_overshoot': e_grid_imp_overshoot.tolist(),
+            'grid_export_overshoot': e_grid_exp_overshoot.tolist()
+        }
+
+    def solve_scenarios(self, scenarios: List[TimeSeriesData], s_initial: Optional[List[List[float]]] = None,
+                        max_workers: Optional[int] = None) -> List[Dict]:
+        """
+        Solve independent scenarios of this optimizer's configuration in parallel processes,
+        e.g. for rolling horizon or parameter sweep runs. A scenario consists of the time series
+        and, optionally, the initial state of charge of the batteries.
+        The scenarios are split into one contiguous chunk per process. Each process solves its
+        chunk in order with a single optimizer, reusing the model between scenarios with the
+        same time steps (see update_time_series()).
+        Returns the results in the order of the scenarios
+        """
 
-            # Extract flow direction
-            for y_var in self.variables['y']:
-                if y_var is not None:
-                    result['flow_direction'].append(int(pulp.value(y_var)))
-                else:
-                    result['flow_direction'].append(0)  # Default to import when constraint not active
+        for time_series in scenarios:
+            self._check_battery_series(len(time_series.gt))
+        if s_initial is None:
+            s_initial = [None] * len(scenarios)
+        # scenarios without initial state of charge start from the one of this optimizer
+        own_s_initial = [bat.s_initial for bat in self.batteries]
+        jobs = [(time_series, soc if soc is not None else own_s_initial) for time_series, soc in zip(scenarios, s_initial, strict=True)]
+        if not jobs:
+            return []
+
+        workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+        chunk_size = -(-len(jobs) // workers)
+        chunks = [jobs[k:k + chunk_size] for k in range(0, len(jobs), chunk_size)]
+
+        # the workers build their own model, don't send this one
+        template = copy.copy(self)
+        template.problem = None
+        template.variables = {}
+        template.warm_start = None
+
+        with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+            results = executor.map(_solve_chunk, [template] * len(chunks), chunks)
+            return [result for chunk_results in results for result in chunk_results]
+
+    def _run_solver(self, warm_start: Optional[highs.WarmStart] = None):
+        """
+        Solve the current problem with the selected solver, falling back to CBC if highspy is not installed
+        """
+        # in-process solver, no model files are written
+        if self.solver == 'highs' and highs.available():
+            _, self.warm_start = highs.solve(self.problem, self.settings, warm_start)
+            return
 
-            return result
-        else:
-            return {
-                'status': status,
-                'objective_value': None,
-                'limit_violations': {
-                    'grid_import_limit_exceeded': False,
-                    'grid_export_limit_hit': False
-                },
-                'batteries': [],
-                'grid_import': [],
-                'grid_export': [],
-                'flow_direction': [],
-                'grid_import_overshoot': [],
-                'grid_export_overshoot': []
-            }
+        solver = pulp.PULP_CBC_CMD(
+            msg=0,
+            threads=self.settings.num_threads,
+            timeLimit=self.settings.time_limit,
+        )
+        # the command line solver exchanges model and solution through files
+        with TemporaryDirectory(dir=self.settings.tmp_dir) as tmpdir:
+            solver.tmpDir = tmpdir
+            self.problem.solve(solver)
 
     def get_clean_objective_value(self):
         '''
         recalculate the objective value without penalties and strategy icentives
         '''
-        clean_objective = 0
         # Grid import cost (negative because we want to minimize cost) [currency unit]
-        for t in self.time_steps:
-            if self.grid.p_max_imp is not None:
-                clean_objective -= (
-                    # grid import up to the demand rate threshold
-                    pulp.value(self.variables['n'][t])
-                    # import beyond the threshold
-                    + pulp.value(self.variables['e_imp_lim_exc'][t])
-                ) * self.time_series.p_N[t]
-            else:
-                # standard case
-                clean_objective -= pulp.value(self.variables['n'][t]) * self.time_series.p_N[t]
+        e_grid_import = _values(self.variables['n'])
+        if self.grid.p_max_imp is not None:
+            # import beyond the threshold
+            e_grid_import += _values(self.variables['e_imp_lim_exc'])
+        clean_objective = - np.dot(e_grid_import, self._pN)
 
         # Grid export revenue [currency unit]
-        for t in self.time_steps:
-            clean_objective += pulp.value(self.variables['e'][t]) * self.time_series.p_E[t]
+        clean_objective += np.dot(_values(self.variables['e']), self._pE)
 
         # Final state of charge value [currency unit]
         for i, bat in enumerate(self.batteries):
-            clean_objective += (pulp.value(self.variables['s'][i][self.T-1])
-                                - pulp.value(self.variables['s'][i][0])) * bat.p_a
+            clean_objective += (self.variables['s'][i][self.T-1].varValue
+                                - self.variables['s'][i][0].varValue) * bat.p_a
 
         # charge for import power demand rate. The demand rate is applied to the maximum
         # power draw beyond the threshold within the time horizon.
         if self.is_grid_demand_rate_active:
             clean_objective += - self.grid.prc_p_exc_imp \
-                * pulp.value(self.variables['p_max_imp_exc'])
+                * self.variables['p_max_imp_exc'].varValue
+
+        return float(clean_objective)
 
-        return clean_objective
+
+def _solve_chunk(optimizer: Optimizer, jobs: List[tuple]) -> List[Dict]:
+    """
+    Solve scenarios one after the other with the same optimizer, see Optimizer.solve_scenarios()
+    """
+    results = []
+    for time_series, s_initial in jobs:
+        optimizer.update_time_series(time_series, s_initial)
+        results.append(optimizer.solve())
+    return results
@@ -1,9 +1,21 @@
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# solver backends: 'highs' runs HiGHS in-process via highspy, 'cbc' runs the CBC executable shipped with PuLP
+Solver = Literal["cbc", "highs"]
+
 
 class OptimizerSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="OPTIMIZER_")
 
     num_threads: int | None = Field(default=None, description="Number of threads to use for optimization")
     time_limit: float | None = Field(default=None, description="Time limit for the optimization process in seconds")
+    solver: Solver = Field(default="cbc", description="Solver backend. 'highs' falls back to CBC if the highspy package is not installed")
+    c_min_threshold: float = Field(default=0., ge=0.,
+                                   description="Ignore minimum charge powers below this fraction of c_max. "
+                                   "Removes the charge on/off binaries, but the result may charge below c_min")
+    tmp_dir: str | None = Field(default=None, description="Directory for the model and solution files of CBC, e.g. /dev/shm to keep them in memory. "
+                                "Defaults to the system temporary directory")
+    lazy_flow_direction: bool = Field(default=False, description="Add grid flow direction constraints only for time steps where they are violated")
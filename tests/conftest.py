@@ -0,0 +1,29 @@
+import json
+import pathlib
+
+import pytest
+
+from optimizer.app import parse_optimizer_args
+from optimizer.optimizer import Optimizer
+from optimizer.settings import OptimizerSettings
+
+
+def create_optimizer(request: dict, **settings) -> Optimizer:
+    return Optimizer(**parse_optimizer_args(request), optimizer_settings=OptimizerSettings(**settings))
+
+
+@pytest.fixture
+def optimizer_factory():
+    """
+    Factory creating an optimizer from a charge-schedule request and optimizer settings,
+    parsed the same way as by the API
+    """
+    return create_optimizer
+
+
+@pytest.fixture
+def base_request() -> dict:
+    """
+    The request of test case 009, a fresh copy for each test
+    """
+    return json.loads(pathlib.Path('test_cases/009-discharge-before-import.json').read_text())["request"]
@@ -0,0 +1,58 @@
+import json
+import pathlib
+
+import numpy
+import pulp
+import pytest
+
+from optimizer import highs
+
+pytest.importorskip("highspy")
+
+
+@pytest.mark.parametrize('test_case', sorted(pathlib.Path('test_cases').glob('*.json')))
+def test_highs_matches_cbc(test_case: pathlib.Path, optimizer_factory):
+    request = json.loads(test_case.read_text())["request"]
+
+    cbc = optimizer_factory(request, solver='cbc')
+    cbc_result = cbc.solve()
+    highs = optimizer_factory(request, solver='highs')
+    highs_result = highs.solve()
+
+    assert highs_result['status'] == cbc_result['status']
+    # the clean objective value may differ between alternative optima, the full objective must not
+    assert numpy.isclose(pulp.value(highs.problem.objective), pulp.value(cbc.problem.objective), rtol=1e-4)
+
+    # the reported flow direction must agree with the grid flows
+    for t, direction in enumerate(highs_result['flow_direction']):
+        if direction == 1:
+            assert highs_result['grid_import'][t] < 1e-6
+        else:
+            assert highs_result['grid_export'][t] < 1e-6
+    # energies carry no negative solver noise
+    for bat in highs_result['batteries']:
+        assert min(bat['charging_power'] + bat['discharging_power']) >= 0.
+    assert min(highs_result['grid_import'] + highs_result['grid_export']) >= 0.
+
+
+def test_highs_warm_start(base_request, optimizer_factory):
+    previous = optimizer_factory(base_request, solver='highs')
+    previous.solve()
+    assert previous.warm_start is not None
+
+    # next run with slightly changed prices
+    base_request['time_series']['p_N'] = [p * 1.01 for p in base_request['time_series']['p_N']]
+    cold = optimizer_factory(base_request, solver='highs')
+    cold_result = cold.solve()
+    warm = optimizer_factory(base_request, solver='highs')
+    warm_result = warm.solve(warm_start_from=previous)
+
+    # the state of the previous run fits the new model and is passed to HiGHS
+    assert previous.warm_start.matches(*highs.structure(warm.problem))
+    # but not a model of a different horizon
+    short_request = dict(base_request, time_series={key: values[:24] for key, values in base_request['time_series'].items()})
+    short = optimizer_factory(short_request, solver='highs')
+    short.create_model()
+    assert not previous.warm_start.matches(*highs.structure(short.problem))
+    assert warm_result['status'] == cold_result['status'] == 'Optimal'
+    assert numpy.isclose(pulp.value(warm.problem.objective), pulp.value(cold.problem.objective), rtol=1e-4)
@@ -0,0 +1,201 @@
+import json
+import logging
+import pathlib
+import tempfile
+
+import numpy
+import pulp
+import pytest
+
+from optimizer import highs
+from optimizer.app import parse_optimizer_args
+from optimizer.optimizer import Optimizer, TimeSeriesData
+
+
+@pytest.mark.parametrize('test_case', sorted(pathlib.Path('test_cases').glob('*.json')))
+def test_lazy_flow_direction(test_case: pathlib.Path, optimizer_factory):
+    request = json.loads(test_case.read_text())["request"]
+
+    eager = optimizer_factory(request)
+    eager_result = eager.solve()
+    lazy = optimizer_factory(request, lazy_flow_direction=True)
+    lazy_result = lazy.solve()
+
+    assert lazy_result['status'] == eager_result['status']
+    assert numpy.isclose(pulp.value(lazy.problem.objective), pulp.value(eager.problem.objective), rtol=1e-4)
+
+    # the lazy solution must satisfy the flow direction constraints of all time steps
+    for t, direction in enumerate(lazy_result['flow_direction']):
+        if direction == 1:
+            assert lazy_result['grid_import'][t] < 1e-6
+        else:
+            assert lazy_result['grid_export'][t] < 1e-6
+
+
+def test_lazy_flow_direction_battery_transfer(optimizer_factory):
+    # energy moved from a battery that must not discharge to grid into one that must not charge
+    # from grid requires contradicting flow directions, even without any grid import or export
+    request = {
+        'batteries': [
+            {'charge_from_grid': False, 'discharge_to_grid': True, 's_min': 0, 's_max': 10000, 's_initial': 0,
+             's_goal': [0, 0, 0, 4000], 'c_min': 0, 'c_max': 5000, 'd_max': 5000, 'p_a': 0},
+            {'charge_from_grid': True, 'discharge_to_grid': False, 's_min': 0, 's_max': 10000, 's_initial': 10000,
+             'c_min': 0, 'c_max': 5000, 'd_max': 5000, 'p_a': 0},
+        ],
+        'time_series': {'dt': [3600] * 4, 'gt': [0] * 4, 'ft': [0] * 4, 'p_N': [0.3] * 4, 'p_E': [0] * 4},
+    }
+
+    eager = optimizer_factory(request)
+    eager.solve()
+    lazy = optimizer_factory(request, lazy_flow_direction=True)
+    lazy_result = lazy.solve()
+
+    assert numpy.isclose(pulp.value(lazy.problem.objective), pulp.value(eager.problem.objective))
+    assert lazy_result['batteries'][0]['charging_power'] == [0.] * 4
+
+
+@pytest.mark.parametrize('test_case', ['009-discharge-before-import.json', '014-grid-import-limit-violation.json'])
+def test_update_time_series(test_case: str, optimizer_factory):
+    request = json.loads((pathlib.Path('test_cases') / test_case).read_text())["request"]
+
+    reused = optimizer_factory(request)
+    reused.solve()
+    problem = reused.problem
+
+    # next run with changed forecasts, prices and initial state of charge
+    time_series = request['time_series']
+    time_series['p_N'] = [p * 1.2 for p in time_series['p_N']]
+    time_series['p_E'] = [p * 0.8 for p in time_series['p_E']]
+    time_series['ft'] = [f * 0.9 for f in time_series['ft']]
+    time_series['gt'] = [g * 1.1 for g in time_series['gt']]
+    for bat in request['batteries']:
+        bat['s_initial'] = (bat['s_min'] + bat['s_max']) / 2
+
+    reused.update_time_series(TimeSeriesData(**time_series), s_initial=[bat['s_initial'] for bat in request['batteries']])
+    reused_result = reused.solve()
+    assert reused.problem is problem
+
+    fresh = optimizer_factory(request)
+    fresh_result = fresh.solve()
+
+    assert reused_result['status'] == fresh_result['status'] == 'Optimal'
+    assert numpy.isclose(pulp.value(reused.problem.objective), pulp.value(fresh.problem.objective), rtol=1e-5)
+
+
+def test_update_time_series_structure_change(base_request, optimizer_factory):
+    optimizer = optimizer_factory(base_request)
+    optimizer.solve()
+
+    time_series = base_request['time_series']
+    time_series['dt'] = [1800 for _ in time_series['dt']]
+    optimizer.update_time_series(TimeSeriesData(**time_series))
+    assert optimizer.problem is None
+
+    result = optimizer.solve()
+    assert result['status'] == 'Optimal'
+    assert optimizer.variables['c'][0][0].upBound == pytest.approx(base_request['batteries'][0]['c_max'] / 2)
+
+
+def test_update_time_series_s_initial_length(base_request, optimizer_factory):
+    optimizer = optimizer_factory(base_request)
+    with pytest.raises(ValueError):
+        optimizer.update_time_series(TimeSeriesData(**base_request['time_series']), s_initial=[0.])
+
+
+def test_update_time_series_horizon_change(base_request, optimizer_factory):
+    optimizer = optimizer_factory(base_request)
+    optimizer.solve()
+
+    time_series = {key: values[:24] for key, values in base_request['time_series'].items()}
+    optimizer.update_time_series(TimeSeriesData(**time_series))
+    assert optimizer.problem is None
+
+    result = optimizer.solve()
+    assert result['status'] == 'Optimal'
+    assert len(result['grid_import']) == 24
+
+    # batteries with charge demand or SOC goal series can't follow a changed horizon
+    for test_case in ['010-infesible-charge-goal.json', '011-infeasible-charge-demand.json']:
+        request = json.loads((pathlib.Path('test_cases') / test_case).read_text())["request"]
+        optimizer = optimizer_factory(request)
+        optimizer.solve()
+        time_series = TimeSeriesData(**{key: values[:24] for key, values in request['time_series'].items()})
+        with pytest.raises(ValueError):
+            optimizer.update_time_series(time_series)
+        with pytest.raises(ValueError):
+            optimizer.solve_scenarios([time_series])
+        # the optimizer is unchanged
+        assert optimizer.T == len(request['time_series']['gt'])
+        assert optimizer.solve()['status'] == 'Optimal'
+
+
+def test_c_min_threshold(base_request, optimizer_factory):
+    exact = optimizer_factory(base_request)
+    exact_result = exact.solve()
+    # c_min is 1/8 of c_max for the first battery, the second one has no minimum charge power
+    relaxed = optimizer_factory(base_request, c_min_threshold=0.2)
+    relaxed_result = relaxed.solve()
+
+    assert relaxed_result['status'] == exact_result['status'] == 'Optimal'
+    assert relaxed.variables['z_c'][0] is None
+    assert not any(name.startswith('c_min_') for name in relaxed.problem.constraints)
+    # dropping the minimum charge power relaxes the problem
+    assert pulp.value(relaxed.problem.objective) >= pulp.value(exact.problem.objective) - 1e-6
+
+
+def test_solve_scenarios(base_request, optimizer_factory):
+    scenarios = []
+    for factor in [0.8, 1.0, 1.2, 1.5]:
+        time_series = dict(base_request['time_series'])
+        time_series['p_N'] = [p * factor for p in time_series['p_N']]
+        scenarios.append(TimeSeriesData(**time_series))
+    s_initial = [None, None, [bat['s_max'] for bat in base_request['batteries']], None]
+
+    optimizer = optimizer_factory(base_request)
+    results = optimizer.solve_scenarios(scenarios, s_initial=s_initial, max_workers=2)
+    assert len(results) == len(scenarios)
+
+    for time_series, soc, result in zip(scenarios, s_initial, results):
+        scenario_request = dict(base_request, time_series=time_series.__dict__)
+        if soc is not None:
+            scenario_request['batteries'] = [dict(bat, s_initial=s) for bat, s in zip(base_request['batteries'], soc)]
+        expected = optimizer_factory(scenario_request).solve()
+
+        assert result['status'] == expected['status'] == 'Optimal'
+        assert numpy.isclose(result['objective_value'], expected['objective_value'], rtol=1e-5)
+
+
+def test_highs_fallback_warning(base_request, optimizer_factory, monkeypatch, caplog):
+    monkeypatch.setattr(highs, 'highspy', None)
+
+    with caplog.at_level(logging.WARNING):
+        optimizer = optimizer_factory(base_request, solver='highs')
+    assert 'falling back to CBC' in caplog.text
+    assert optimizer.solve()['status'] == 'Optimal'
+
+
+def test_solve_scenarios_s_initial_length(base_request, optimizer_factory):
+    scenarios = [TimeSeriesData(**base_request['time_series'])] * 3
+
+    optimizer = optimizer_factory(base_request)
+    with pytest.raises(ValueError):
+        optimizer.solve_scenarios(scenarios, s_initial=[None])
+
+
+def test_unknown_solver(base_request):
+    with pytest.raises(ValueError):
+        Optimizer(**parse_optimizer_args(base_request), solver='gurobi')
+
+
+def test_tmp_dir(base_request, optimizer_factory, tmp_path, monkeypatch):
+    tmp_dirs = []
+
+    def temporary_directory(dir=None):
+        tmp_dirs.append(dir)
+        return tempfile.TemporaryDirectory(dir=dir)
+    monkeypatch.setattr('optimizer.optimizer.TemporaryDirectory', temporary_directory)
+
+    assert optimizer_factory(base_request).solve()['status'] == 'Optimal'
+    assert optimizer_factory(base_request, tmp_dir=str(tmp_path)).solve()['status'] == 'Optimal'
+    # the system temporary directory unless configured
+    assert tmp_dirs == [None, str(tmp_path)]